@@ -1,15 +1,73 @@
 import cv2
 import math
+import numpy as np
+import os
+import queue
 import serial
+import signal
+import threading
 import time
 
-# Load the Haar cascade file for face detection
-face_cascade = cv2.CascadeClassifier(
-    cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-)
+# Use the SSD face detector from assets/ instead of the Haar cascade
+USE_DNN = True
+
+# Minimum confidence for a DNN detection to count as a face
+DNN_CONFIDENCE = 0.5
+
+# Factor the grayscale frame is shrunk by before running the Haar cascade
+DETECT_DOWNSCALE = 2
+
+# Smallest and largest face the Haar cascade looks for (in full frame pixels),
+# bounding these lets the cascade skip whole levels of its image pyramid
+MIN_FACE_SIZE = 80
+MAX_FACE_SIZE = 300
+
+# Scale step between pyramid levels, 1.2 scans about half as many as 1.1
+HAAR_SCALE_FACTOR = 1.2
+
+# Run face detection on every Nth frame, reusing the last faces in between
+DETECT_EVERY_N = 3
+
+# Serial baud rate, must match Serial.begin() in motorControls.ino
+SERIAL_BAUD = 115200
+
+# First byte of every [header, pitch, yaw] packet, never a valid angle
+PACKET_HEADER = 0xFF
+
+# Draw detections and show the preview window, disable to run headless
+SHOW_DEBUG_INFO = True
+
+# Resolution and frame rate requested from the webcam
+CAPTURE_WIDTH = 640
+CAPTURE_HEIGHT = 480
+CAPTURE_FPS = 30
+
+# Minimum seconds between packets and minimum angle change worth sending
+SEND_INTERVAL = 0.05
+SEND_MIN_DELTA = 2
+
+# Offload OpenCV work to the GPU through OpenCL (T-API) when it is available
+cv2.ocl.setUseOpenCL(True)
+use_opencl = cv2.ocl.haveOpenCL()
+
+# Load the face detector
+if USE_DNN:
+    assets = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+    net = cv2.dnn.readNetFromCaffe(
+        os.path.join(assets, "deploy.prototxt"),
+        os.path.join(assets, "res10_300x300_ssd_iter_140000_fp16.caffemodel"),
+    )
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(
+        cv2.dnn.DNN_TARGET_OPENCL if use_opencl else cv2.dnn.DNN_TARGET_CPU
+    )
+else:
+    face_cascade = cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    )
 
 # Establish a serial connection
-ser = serial.Serial("/dev/cu.usbmodemDC5475C3BB642", 9600)
+ser = serial.Serial("/dev/cu.usbmodemDC5475C3BB642", SERIAL_BAUD)
 
 # Allow some time for the connection to establish
 time.sleep(2)
@@ -17,37 +75,154 @@ time.sleep(2)
 # Open the webcam (the value inside depends on your system)
 cap = cv2.VideoCapture(1)
 
+# Keep only the newest frame in the driver buffer so reads are never stale
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+# Ask for MJPG at a fixed resolution, it needs far less USB bandwidth than YUYV
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+cap.set(cv2.CAP_PROP_FPS, CAPTURE_FPS)
+
 # Store the resolution of the camera (in pixels)
 f_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 f_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
+# Scales normalized DNN box corners to pixels, the resolution never changes
+box_scale = np.array([f_w, f_h, f_w, f_h], dtype=np.float32)
+
+# Preallocated grayscale buffers for the Haar cascade, reused every frame
+small_dsize = (f_w // DETECT_DOWNSCALE, f_h // DETECT_DOWNSCALE)
+if not USE_DNN:
+    if use_opencl:
+        gray_buf = cv2.UMat(f_h, f_w, cv2.CV_8UC1)
+        small_buf = cv2.UMat(small_dsize[1], small_dsize[0], cv2.CV_8UC1)
+    else:
+        gray_buf = np.empty((f_h, f_w), dtype=np.uint8)
+        small_buf = np.empty((small_dsize[1], small_dsize[0]), dtype=np.uint8)
+
 
 # Function to calculate angle
 def anglecalc(horizontal, vertical):
-    return math.floor(math.atan(vertical / horizontal) * (180 / math.pi))
+    return math.floor(math.degrees(math.atan2(vertical, horizontal)))
+
+
+# Function to detect faces, returns (x, y, w, h) boxes in frame coordinates
+def detect_faces(frame):
+    if USE_DNN:
+        blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104, 177, 123))
+        net.setInput(blob)
+        detections = net.forward()[0, 0]
+
+        # Keep confident detections and scale their corners to the frame size
+        boxes = detections[detections[:, 2] > DNN_CONFIDENCE, 3:7]
+        boxes = (boxes * box_scale).astype(int).tolist()
+        return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in boxes]
+
+    # Wrap the frame in a UMat so conversion and detection run through OpenCL
+    if use_opencl:
+        frame = cv2.UMat(frame)
+
+    # Convert frames to grayscale for face detection
+    cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+
+    # Shrink the grayscale frame, the cascade scan dominates the loop's cost
+    cv2.resize(gray_buf, small_dsize, dst=small_buf, interpolation=cv2.INTER_AREA)
+
+    # Perform face detection and scale back up to full frame coordinates
+    min_size = MIN_FACE_SIZE // DETECT_DOWNSCALE
+    max_size = MAX_FACE_SIZE // DETECT_DOWNSCALE
+    faces = face_cascade.detectMultiScale(
+        small_buf,
+        HAAR_SCALE_FACTOR,
+        4,
+        minSize=(min_size, min_size),
+        maxSize=(max_size, max_size),
+    )
+    return [tuple(int(v) * DETECT_DOWNSCALE for v in face) for face in faces]
 
     # Print the video resolution
 
 
-print(f"Video resolution: {f_w}x{f_h}")
+fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+codec = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4))
+print(f"Video resolution: {f_w}x{f_h} ({codec})")
+
+# Holds only the latest captured frame, None marks the end of the stream
+frames = queue.Queue(maxsize=1)
+stop_capture = threading.Event()
+
+
+# Function to read frames on a separate thread so capture overlaps detection
+def capture_frames():
+    while not stop_capture.is_set():
+        ret, frame = cap.read()
+
+        # Drop the previous frame if the main loop hasn't picked it up yet
+        try:
+            frames.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Check if frames were read correctly
+        if not ret:
+            frames.put(None)
+            break
+        frames.put(frame)
+
+
+capture_thread = threading.Thread(target=capture_frames, daemon=True)
+capture_thread.start()
+
+# Count frames to decide when to run detection, start with no faces
+frame_idx = 0
+faces = []
+
+# Time and yaw of the last packet sent to the Arduino
+last_send = 0.0
+last_yaw = None
+
+# Stop the loop on Ctrl+C, the only way out when running headless
+stop_requested = threading.Event()
+signal.signal(signal.SIGINT, lambda signum, stack: stop_requested.set())
 
-while True:
-    # Read frames from the webcam
-    ret, frame = cap.read()
+while not stop_requested.is_set():
+    # Wait for the newest frame from the capture thread
+    frame = frames.get()
 
-    # Check if frames were read correctly
-    if not ret:
+    if frame is None:
         print("Can't receive frame (stream end?). Exiting ...")
         break
 
-    # Flip the frame horizontally
-    frame = cv2.flip(frame, 1)
+    # Faces move little between frames, so only detect every Nth frame
+    if frame_idx % DETECT_EVERY_N == 0:
+        faces = detect_faces(frame)
+    frame_idx += 1
 
-    # Convert frames to grayscale for face detection
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # Aim at the largest (closest) face only, so angles are computed once
+    if faces:
+        x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+        c_x, c_y = x + w // 2, y + h // 2
+
+        # Calculate angles and send to Arduino via serial connection
+        # (the frame is never flipped, so mirror the center horizontally)
+        yaw = anglecalc(f_w - c_x, f_h - c_y)
+        # pitch = anglecalc(c_z,c_x)
+        pitch = 40
 
-    # Perform face detection
-    faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+        # Only send when the link is free and the target actually moved
+        now = time.monotonic()
+        if now - last_send > SEND_INTERVAL and (
+            last_yaw is None or abs(yaw - last_yaw) > SEND_MIN_DELTA
+        ):
+            packet = bytes((PACKET_HEADER, pitch & 0xFF, yaw & 0xFF))
+            print(packet)
+            ser.write(packet)
+            last_send, last_yaw = now, yaw
+
+    # Skip all drawing and the preview window when running headless
+    if not SHOW_DEBUG_INFO:
+        continue
 
     # Draw rectangle around faces and a red dot at the center
     for x, y, w, h in faces:
@@ -57,26 +232,20 @@ while True:
         # Draw a point at the center of rectangle
         cv2.circle(frame, (c_x, c_y), radius=2, color=(0, 0, 255), thickness=-1)
 
-        # Calculate angles and send to Arduino via serial connection
-        yaw = anglecalc(c_x, f_h - c_y)
-        # pitch = anglecalc(c_z,c_x)
-        pitch = 40
-        data = str(yaw).encode()
-        print(data)
-        # time.sleep(1)
-        ser.write(data)
-
     # Draw a green point at center of frame
     cv2.circle(frame, (f_w // 2, f_h // 2), radius=2, color=(0, 255, 0), thickness=-1)
 
-    # Display resulting frames
-    cv2.imshow("Webcam", frame)
+    # Display resulting frames mirrored through a negative-stride view
+    cv2.imshow("Webcam", frame[:, ::-1])
 
     # Break loop on 'q' key press
     if cv2.waitKey(1) & 0xFF == ord("q"):
         break
 
-# Release webcam, destroy all windows and close serial connection after loop ends
+# Stop the capture thread, release webcam, destroy all windows and close
+# serial connection after loop ends
+stop_capture.set()
+capture_thread.join()
 cap.release()
 cv2.destroyAllWindows()
 ser.close()
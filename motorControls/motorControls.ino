@@ -2,18 +2,23 @@
 // #include <iostream>
 // #include <thread>
 
+const byte PACKET_HEADER = 0xFF;  // First byte of every [header, pitch, yaw] packet
+const unsigned long STEP_INTERVAL_MS = 15;  // Time for the servo to move one degree
+
 String data;     // String to hold incoming serial data
 int pitch, yaw;  // Variables to hold the pitch and yaw values
 
 Servo servoPitch;  // Servo to control pitch
 Servo servo;    // Servo to control yaw
 int currentPosition = servo.read();
+unsigned long nextStep = 0;  // millis() deadline of the next one-degree step
 
 void setup() {
-  Serial.begin(9600);  // Start serial communication at 115200 baud rate
+  Serial.begin(115200);  // Start serial communication at 115200 baud rate
 
   servoPitch.attach(9);  // Attach the pitch servo to pin 9
   servo.attach(10);   // Attach the yaw servo to pin 10
+  yaw = currentPosition;  // Hold still until the first packet arrives
 
   // std::thread t(readSerial);
   // t.join();
@@ -46,25 +51,34 @@ void setup() {
 // }
 
 void loop() {
-  // int currentPosition = servo.read();
-  int target = 0;
-  if (Serial.available()) {
-  data = Serial.readStringUntil('\n');
-    target = data.toInt();
-    // target = data;
+  // Read every complete packet waiting, skipping bytes until a header
+  while (Serial.available() >= 3) {
+    if (Serial.read() != PACKET_HEADER) {
+      continue;
+    }
+    pitch = Serial.read();
+    yaw = Serial.read();
     Serial.print("Target: ");
-    Serial.println(data);
+    Serial.println(yaw);
+  }
+
+  // Step the yaw servo one degree towards the latest target on a fixed
+  // schedule, without blocking so packets keep being read between steps
+  if ((long)(millis() - nextStep) >= 0) {
+    if (yaw > currentPosition) {
+      servo.write(++currentPosition);
+    } else if (yaw < currentPosition) {
+      servo.write(--currentPosition);
+    }
+    nextStep += STEP_INTERVAL_MS;
 
-    if (target > currentPosition) {
-      servo.write(currentPosition++);
-    } else {
-      servo.write(currentPosition--);
+    // Don't burst through missed steps after falling behind
+    if ((long)(millis() - nextStep) >= 0) {
+      nextStep = millis() + STEP_INTERVAL_MS;
     }
-    delay(15);  // Wait 15ms for the servo to reach the position
-    // Serial.print("Position: ");
-    // Serial.println(currentPosition);
   }
-  delay(100);
+  // Serial.print("Position: ");
+  // Serial.println(currentPosition);
 }
 
 // void readSerial() {
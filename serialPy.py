@@ -6,6 +6,6 @@ ser = serial.Serial("/dev/cu.usbmodemDC5475C3BB642", 115200)
 
 while True:
     angle = random.randint(0, 90)  # generate random angle between 0 and 90
-    ser.write(str(angle).encode())  # send the angle to the serial port
+    ser.write(bytes((0xFF, 40, angle)))  # send a [header, pitch, yaw] packet
     print(f"Sent: {angle}")  # print the sent angle
     time.sleep(1)  # wait for a second before generating next angle